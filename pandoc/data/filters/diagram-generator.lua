@@ -67,6 +67,8 @@ local path = require 'pandoc.path'
 
 local depfile_path = nil
 local diagram_dependencies = {}
+local rendered_images = {}
+local prepared_directories = {}
 
 local function record_dependency(file_path)
   if not file_path or file_path == '' or file_path:find('[\r\n]') then
@@ -184,6 +186,8 @@ function Meta(meta)
   local generic_depfile = meta['omnidoc-depfile-diagram-generator']
   depfile_path = generic_depfile and stringify(generic_depfile) or nil
   diagram_dependencies = {}
+  rendered_images = {}
+  prepared_directories = {}
   -- Update tool paths from metadata if provided
   plantuml_path = stringify(
     meta.plantuml_path or meta.plantumlPath or plantuml_path
@@ -333,16 +337,20 @@ local tikz_template = [[
 \end{document}
 ]]
 
---- Create Inkscape converter function for PDF to other formats
+local inkscape_v1_by_path = {}
+
+--- Check whether the configured Inkscape uses the 1.x command syntax
 ---
---- This function returns a converter function that uses Inkscape to convert
---- PDF files to other formats (SVG, PNG). It handles both Inkscape 1.x and
---- older versions with different command-line syntax.
+--- The version probe spawns Inkscape, so its result is remembered per
+--- executable path instead of being repeated for every converted block.
 ---
---- @param filetype string Target format (svg or png)
---- @return function|nil Converter function(pdf_file, outfile), or nil if unsupported
-local function convert_with_inkscape(filetype)
-  -- Check Inkscape version to determine command syntax
+--- @return boolean|nil True for Inkscape 1.x, nil if Inkscape is unavailable
+local function inkscape_is_v1()
+  local cached = inkscape_v1_by_path[inkscape_path]
+  if cached ~= nil then
+    return cached
+  end
+
   local ok, inkscape_v_string = pcall(
     pandoc.pipe,
     inkscape_path,
@@ -352,9 +360,27 @@ local function convert_with_inkscape(filetype)
   if not ok or not inkscape_v_string then
     return nil
   end
-  
+
   local inkscape_v_major = inkscape_v_string:gmatch("([0-9]*)%.")()
   local isv1 = (tonumber(inkscape_v_major) or 0) >= 1
+  inkscape_v1_by_path[inkscape_path] = isv1
+  return isv1
+end
+
+--- Create Inkscape converter function for PDF to other formats
+---
+--- This function returns a converter function that uses Inkscape to convert
+--- PDF files to other formats (SVG, PNG). It handles both Inkscape 1.x and
+--- older versions with different command-line syntax.
+---
+--- @param filetype string Target format (svg or png)
+--- @return function|nil Converter function(pdf_file, outfile), or nil if unsupported
+local function convert_with_inkscape(filetype)
+  -- Check Inkscape version to determine command syntax
+  local isv1 = inkscape_is_v1()
+  if isv1 == nil then
+    return nil
+  end
 
   local function build_args(pdf_file, outfile)
     if isv1 and filetype == 'png' then
@@ -594,24 +620,32 @@ end
 local function create_directory_and_write_file(directory, file_name, binary_data)
   local full_path = directory .. "/" .. file_name
 
-  -- Create directory if necessary
-  local created = false
-  if system.make_directory then
-    created = pcall(system.make_directory, directory, true)
-  end
-  if not created then
-    local ok, mkdir_err = pcall(pandoc.pipe, "mkdir", {"-p", directory}, "")
-    if not ok then
-      error("Could not create directory '" .. directory .. "': " .. tostring(mkdir_err))
+  -- Create directory once per run; every figure shares the same target.
+  if not prepared_directories[directory] then
+    local created = false
+    if system.make_directory then
+      created = pcall(system.make_directory, directory, true)
+    end
+    if not created then
+      local ok, mkdir_err = pcall(pandoc.pipe, "mkdir", {"-p", directory}, "")
+      if not ok then
+        error("Could not create directory '" .. directory .. "': " .. tostring(mkdir_err))
+      end
     end
+    prepared_directories[directory] = true
   end
 
   -- Preserve the existing file only when it already contains the rendered
   -- bytes. A fixed Pandoc identifier deliberately produces a fixed filename,
   -- but it must not turn that filename into a stale content cache.
+  -- The size check avoids loading a previous figure that cannot match.
   local existing = io.open(full_path, "rb")
   if existing then
-    local existing_data = existing:read("*all")
+    local existing_data = nil
+    if existing:seek("end") == #binary_data then
+      existing:seek("set")
+      existing_data = existing:read("*all")
+    end
     existing:close()
     if existing_data == binary_data then
       return true
@@ -651,13 +685,26 @@ end
 
 --- Generate image and save it to file
 ---
+--- Identical blocks within one document are rendered once. The memo lives
+--- only for the current Pandoc run: renderer output may depend on external
+--- inputs, and cross-build invalidation belongs to OmniDoc's depfile graph.
+---
 --- @param block table The CodeBlock element
 --- @param converter function The converter function to use
 --- @return string|nil Binary image data, or nil on error
 local function generate_image(block, converter, output_type)
+  local additional_packages = block.attributes["additionalPackages"]
+  local cache_key = pandoc.sha1(table.concat({
+    block.classes[1], output_type, additional_packages or "", block.text
+  }, "\0"))
+  local cached = rendered_images[cache_key]
+  if cached then
+    return cached
+  end
+
   -- Call the converter to generate the image
   local success, img = pcall(converter, block.text,
-                             output_type, block.attributes["additionalPackages"] or nil)
+                             output_type, additional_packages or nil)
 
   -- Handle errors
   if not (success and img) then
@@ -666,6 +713,7 @@ local function generate_image(block, converter, output_type)
     error('Image conversion failed. Aborting.')
   end
 
+  rendered_images[cache_key] = img
   return img
 end
 